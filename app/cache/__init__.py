@@ -1,3 +1,5 @@
 from .recommendation_cache import RecommendationCache
+from .shared_cache import SharedRecommendationCache
+from .tiered_cache import TieredRecommendationCache
 
-__all__ = ['RecommendationCache']
\ No newline at end of file
+__all__ = ['RecommendationCache', 'SharedRecommendationCache', 'TieredRecommendationCache']
\ No newline at end of file
@@ -35,6 +35,13 @@ class RecommendationCache:
         self.timestamps[user_id] = time.time()
         self.cache.move_to_end(user_id)
     
+    def clear(self):
+        """
+        Remove every entry from cache
+        """
+        self.cache.clear()
+        self.timestamps.clear()
+    
     def _is_valid(self, user_id: int) -> bool:
         """
         Check if cached entry is still valid
@@ -0,0 +1,174 @@
+from typing import List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import logging
+import marshal
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Expired and surplus entries are purged once every this many writes
+_PURGE_EVERY = 1000
+
+# Writes queued beyond this are dropped rather than left to pile up
+_MAX_PENDING_WRITES = 1000
+
+class SharedRecommendationCache:
+    """
+    Recommendation cache in an SQLite file shared by every worker on a host.
+
+    Lists are stored marshal-encoded, which is compact and fast for plain
+    dicts, lists and strings. Every entry is stamped with the cache version;
+    bumping the version invalidates all entries for all workers at once.
+
+    Writes and purges run on a background thread with their own connection,
+    so a worker waiting on another's write lock never stalls the event loop.
+    """
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 100000,
+        ttl: int = 3600,
+        version_check_interval: float = 1.0
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl  # Time to live in seconds
+        self.version_check_interval = version_check_interval
+        self._version: Optional[int] = None
+        self._version_checked = 0.0
+        self._writes = 0
+        self._pending_writes = 0
+        self._lock = threading.RLock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = self._connect(path)
+        self._write_conn = self._connect(path)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shared-cache")
+        with self._write_conn:
+            self._write_conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    value BLOB NOT NULL
+                )
+                """
+            )
+            self._write_conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._write_conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 1)")
+            # marshal output is only readable by the same format version
+            self._write_conn.execute("INSERT OR IGNORE INTO meta VALUES ('format', ?)", (marshal.version,))
+
+        row = self._write_conn.execute("SELECT value FROM meta WHERE name = 'format'").fetchone()
+        if row[0] != marshal.version:
+            self.invalidate_all()
+            with self._write_conn:
+                self._write_conn.execute("UPDATE meta SET value = ? WHERE name = 'format'", (marshal.version,))
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, timeout=1.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def current_version(self) -> int:
+        """
+        Get the cache version, re-read at most once per check interval
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked >= self.version_check_interval:
+            with self._lock:
+                row = self.conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            self._version = row[0]
+            self._version_checked = now
+        return self._version
+
+    def get_recommendations(self, key: str) -> Optional[List[dict]]:
+        """
+        Get cached recommendations if they exist, haven't expired and
+        belong to the current version
+        """
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT value FROM recommendations WHERE key = ? AND version = ? AND expires_at > ?",
+                    (key, self.current_version(), time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return None
+        return marshal.loads(row[0]) if row else None
+
+    def store_recommendations(self, key: str, recommendations: List[dict]):
+        """
+        Queue recommendations to be stored for every worker to see
+        """
+        with self._lock:
+            # The cache is best effort, so a backlog of writes is dropped
+            if self._pending_writes >= _MAX_PENDING_WRITES:
+                return
+            self._pending_writes += 1
+        # Stamped with the version they were ranked under
+        entry = (key, self.current_version(), time.time() + self.ttl, marshal.dumps(recommendations))
+        self._writer.submit(self._write, entry)
+
+    def _write(self, entry: Tuple[str, int, float, bytes]):
+        try:
+            with self._write_conn:
+                self._write_conn.execute("INSERT OR REPLACE INTO recommendations VALUES (?, ?, ?, ?)", entry)
+                self._writes += 1
+                if self._writes % _PURGE_EVERY == 0:
+                    self._purge()
+        except sqlite3.Error as e:
+            # Another worker may hold the write lock
+            logger.warning(f"Shared cache write failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending_writes -= 1
+
+    def flush(self):
+        """
+        Wait until every queued write has been stored
+        """
+        self._writer.submit(lambda: None).result()
+
+    def invalidate_all(self):
+        """
+        Bump the version, invalidating every entry for every worker
+        """
+        self._writer.submit(self._bump_version).result()
+        self._version = None
+
+    def _bump_version(self):
+        with self._write_conn:
+            self._write_conn.execute("UPDATE meta SET value = value + 1 WHERE name = 'version'")
+
+    def _purge(self):
+        """
+        Remove expired and outdated entries, then the oldest beyond max_entries
+        """
+        self._write_conn.execute(
+            "DELETE FROM recommendations WHERE expires_at <= ? OR version < ?",
+            (time.time(), self.current_version())
+        )
+        self._write_conn.execute(
+            """
+            DELETE FROM recommendations WHERE key IN (
+                SELECT key FROM recommendations ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+
+    def close(self):
+        # Let queued writes finish first
+        self._writer.shutdown(wait=True)
+        self._write_conn.close()
+        self.conn.close()
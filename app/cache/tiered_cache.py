@@ -0,0 +1,54 @@
+from typing import List, Optional
+
+from .recommendation_cache import RecommendationCache
+from .shared_cache import SharedRecommendationCache
+
+class TieredRecommendationCache:
+    """
+    In-process LRU in front of the cache shared by all workers on a host
+    """
+    def __init__(self, local: RecommendationCache, shared: Optional[SharedRecommendationCache] = None):
+        self.local = local
+        self.shared = shared
+
+    def get_recommendations(self, key: str) -> Optional[List[dict]]:
+        """
+        Get cached recommendations from the local tier, then the shared one
+        """
+        version = self.shared.current_version() if self.shared else None
+
+        entry = self.local.get_recommendations(key)
+        if entry is not None:
+            # Local entries are dropped once another worker bumps the version
+            entry_version, recommendations = entry
+            if entry_version == version:
+                return recommendations
+
+        if self.shared is None:
+            return None
+
+        recommendations = self.shared.get_recommendations(key)
+        if recommendations is not None:
+            self.local.store_recommendations(key, (version, recommendations))
+        return recommendations
+
+    def store_recommendations(self, key: str, recommendations: List[dict]):
+        """
+        Store recommendations in both tiers
+        """
+        version = self.shared.current_version() if self.shared else None
+        self.local.store_recommendations(key, (version, recommendations))
+        if self.shared is not None:
+            self.shared.store_recommendations(key, recommendations)
+
+    def invalidate_all(self):
+        """
+        Invalidate every entry in both tiers, for all workers
+        """
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.invalidate_all()
+
+    def close(self):
+        if self.shared is not None:
+            self.shared.close()
@@ -0,0 +1,99 @@
+from collections import deque
+from contextvars import ContextVar
+import asyncio
+import time
+
+# Set for requests served in degraded mode, from cached or precomputed
+# picks instead of ranking
+degraded_mode: ContextVar[bool] = ContextVar("degraded_mode", default=False)
+
+class ConcurrencyLimiter:
+    """
+    Caps the requests an endpoint runs at once. Requests wait at most
+    queue_timeout seconds for a slot, so overload is refused before any
+    work is done instead of timing out after it.
+    """
+    def __init__(self, max_concurrency: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot; False if none freed up within the queue timeout
+        """
+        if not self.semaphore.locked():
+            await self.semaphore.acquire()
+            return True
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def release(self):
+        self.semaphore.release()
+
+class LatencyTracker:
+    """
+    Rolling p95 latency checked against an SLO. Once breached it stays
+    breached until p95 is back under recover_ratio of the SLO, so the
+    service doesn't flap between modes.
+
+    Only latencies of fully served requests should be recorded. While
+    breached, those are probes let through at most once per
+    probe_interval, so recovery is judged on real work rather than on
+    the fast degraded responses. Each state change starts a new window,
+    which must hold min_samples latencies before the state can change
+    again.
+    """
+    def __init__(
+        self,
+        slo: float,
+        window: int = 200,
+        recover_ratio: float = 0.8,
+        min_samples: int = 20,
+        probe_interval: float = 0.2
+    ):
+        self.slo = slo  # seconds
+        self.recover_ratio = recover_ratio
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval  # seconds
+        self.latencies = deque(maxlen=window)
+        self.breached = False
+        self._last_probe = 0.0
+
+    def record(self, latency: float) -> bool:
+        """
+        Record a request latency and get whether the SLO is breached
+        """
+        self.latencies.append(latency)
+        if len(self.latencies) < self.min_samples:
+            return self.breached
+        
+        p95 = self.p95()
+        if self.breached:
+            breached = p95 > self.slo * self.recover_ratio
+        else:
+            breached = p95 > self.slo
+        if breached != self.breached:
+            self.breached = breached
+            self.latencies.clear()
+        return self.breached
+
+    def take_probe(self) -> bool:
+        """
+        Get whether a request may be served in full while breached, at
+        most once per probe interval
+        """
+        now = time.monotonic()
+        if now - self._last_probe < self.probe_interval:
+            return False
+        self._last_probe = now
+        return True
+
+    def p95(self) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
@@ -0,0 +1,127 @@
+from typing import Callable, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import functools
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+# Run once by every process executor worker as it starts
+_worker_initializer: Optional[Callable] = None
+_worker_initargs: tuple = ()
+
+def configure_cpu_executor(initializer: Callable, initargs: tuple = ()):
+    """
+    Set a function each process executor worker runs once as it starts,
+    e.g. to build its own copy of read-only state instead of receiving it
+    with every task. Only affects executors created afterwards.
+    """
+    global _worker_initializer, _worker_initargs
+    _worker_initializer = initializer
+    _worker_initargs = initargs
+
+def get_cpu_executor() -> Optional[Executor]:
+    """
+    Get the shared executor for CPU-bound work, or None when it runs inline
+    """
+    global _executor
+    if settings.CPU_EXECUTOR == "inline":
+        return None
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                if settings.CPU_EXECUTOR == "process":
+                    # Created on first use, when the store, cache writer and
+                    # loop monitor threads already run; forking then could
+                    # leave a child stuck on a lock one of them held
+                    _executor = ProcessPoolExecutor(
+                        max_workers=settings.CPU_EXECUTOR_WORKERS,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=_worker_initializer,
+                        initargs=_worker_initargs
+                    )
+                else:
+                    _executor = ThreadPoolExecutor(
+                        max_workers=settings.CPU_EXECUTOR_WORKERS,
+                        thread_name_prefix="cpu"
+                    )
+    return _executor
+
+def shutdown_cpu_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+async def run_cpu_bound(fn, *args, **kwargs):
+    """
+    Run fn off the event loop on the CPU executor.
+
+    With a process executor fn and its arguments are pickled to the worker,
+    so any state they change stays in the worker.
+    """
+    executor = get_cpu_executor()
+    if executor is None:
+        return fn(*args, **kwargs)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+class LoopBlockMonitor:
+    """
+    Watchdog thread that logs whatever is blocking the event loop for
+    longer than a threshold, with the stack of the loop thread
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold: float):
+        self.loop = loop
+        self.threshold = threshold  # seconds
+        self.loop_thread_id = threading.get_ident()
+        self._beat = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loop-block-monitor", daemon=True)
+
+    def start(self) -> "LoopBlockMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._beat.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._beat.clear()
+            started = time.perf_counter()
+            try:
+                self.loop.call_soon_threadsafe(self._beat.set)
+            except RuntimeError:
+                # Loop already closed
+                return
+
+            if not self._beat.wait(self.threshold):
+                frame = sys._current_frames().get(self.loop_thread_id)
+                # The innermost frames point at the blocking handler
+                stack = "".join(traceback.format_stack(frame, limit=8)) if frame else ""
+                logger.warning(
+                    f"Event loop blocked for more than {self.threshold * 1000:.0f} ms in:\n{stack}"
+                )
+                self._beat.wait()
+                if not self._stopped.is_set():
+                    logger.warning(
+                        f"Event loop was blocked for at least {(time.perf_counter() - started) * 1000:.0f} ms"
+                    )
+
+            self._stopped.wait(self.threshold)
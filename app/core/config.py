@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Literal
 
 class Settings(BaseSettings):
     model_config = {
@@ -16,9 +16,58 @@ class Settings(BaseSettings):
     MODEL_HIDDEN_LAYERS: List[int] = [256, 128, 64]
     MODEL_DROPOUT_RATE: float = 0.3
     
+    # Mood ranking: "embedding" or "category"
+    MOOD_RANKING_MODE: Literal["embedding", "category"] = "embedding"
+    # How strongly a user's preferred moods pull their recommendations
+    MOOD_PREFERENCE_WEIGHT: float = 0.3
+    # Trade-off between relevance (0) and diversity (1) when re-ranking
+    DIVERSITY_WEIGHT: float = 0.3
+    # Candidates re-ranked per recommendation returned
+    DIVERSITY_POOL_FACTOR: int = 10
+    
     # Cache Configuration
     CACHE_MAX_SIZE: int = 1000
     CACHE_TTL: int = 3600  # 1 hour
+    # Cache shared by all workers on a host; empty disables it
+    SHARED_CACHE_PATH: str = "data/recommendation_cache.db"
+    SHARED_CACHE_MAX_ENTRIES: int = 100000
+    
+    # User Store Configuration
+    USER_STORE_PATH: str = "data/users.db"
+    USER_STORE_POOL_SIZE: int = 4
+    USER_CACHE_MAX_SIZE: int = 10000
+    # Longest a worker may serve a profile another worker has changed
+    USER_CACHE_TTL: int = 60  # seconds
+    
+    # Startup Configuration
+    # Load the catalogue after the server starts accepting requests
+    BACKGROUND_WARMUP: bool = False
+    
+    # CPU Executor Configuration
+    # "thread" (torch releases the GIL), "process" for pure-Python work,
+    # or "inline" to run on the event loop
+    CPU_EXECUTOR: Literal["thread", "process", "inline"] = "thread"
+    CPU_EXECUTOR_WORKERS: int = 4
+    # Log handlers that block the event loop longer than this; 0 disables
+    LOOP_BLOCK_THRESHOLD_MS: int = 100
+    
+    # Admission Control Configuration
+    # Requests each endpoint runs at once
+    ADMISSION_LIMITS: Dict[str, int] = {
+        "/recommendations/": 32,
+        "/recommendations/mood/": 32
+    }
+    # Longest a request may queue for a slot before a 503
+    ADMISSION_QUEUE_TIMEOUT_MS: int = 200
+    ADMISSION_RETRY_AFTER: int = 1  # seconds
+    # p95 latency of recommendation endpoints above which they degrade
+    LATENCY_SLO_MS: int = 250
+    LATENCY_WINDOW: int = 200
+    # Latencies needed before the SLO state can change
+    LATENCY_MIN_SAMPLES: int = 20
+    # While degraded, one request per interval is served in full to
+    # measure whether the service has recovered
+    LATENCY_PROBE_INTERVAL_MS: int = 200
     
     # API Configuration
     CORS_ORIGINS: List[str] = ["*"]
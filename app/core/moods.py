@@ -0,0 +1,27 @@
+from typing import Dict, List
+
+# 3-d mood features shared by preprocessing and the recommendation service.
+# Axes are (valence, energy, calm), each in [0, 1].
+MOOD_FEATURES: Dict[str, List[float]] = {
+    'happy': [1.0, 0.8, 0.6],
+    'motivated': [0.9, 1.0, 0.7],
+    'relaxed': [0.5, 0.3, 1.0],
+    'focused': [0.8, 0.9, 0.4],
+    'energetic': [1.0, 0.9, 0.8]
+}
+
+# Used for moods that have no features of their own
+DEFAULT_MOOD_FEATURES: List[float] = [0.5, 0.5, 0.5]
+
+# Base mood categories; positions are the category codes used on the wire
+MOOD_CATEGORIES = ('positive', 'negative', 'neutral', 'emotional', 'mental')
+
+# Anchor features for each base mood category, used when a mood is only
+# known through its category
+MOOD_CATEGORY_FEATURES: Dict[str, List[float]] = {
+    'positive': [0.95, 0.85, 0.6],
+    'negative': [0.15, 0.4, 0.3],
+    'neutral': [0.55, 0.35, 0.95],
+    'emotional': [0.7, 0.2, 0.4],
+    'mental': [0.5, 0.7, 0.8]
+}
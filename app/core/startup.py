@@ -0,0 +1,31 @@
+from typing import List, Tuple
+import subprocess
+import sys
+
+def import_time_report(module: str = "main", top: int = 20) -> List[Tuple[str, float, float]]:
+    """
+    Import a module in a fresh interpreter and get the (name, self ms,
+    cumulative ms) of its slowest imports, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True
+    )
+
+    timings = []
+    for line in result.stderr.splitlines():
+        # Lines look like "import time:   self [us] | cumulative | name"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+
+    timings.sort(key=lambda timing: timing[2], reverse=True)
+    return timings[:top]
+
+def format_import_time_report(timings: List[Tuple[str, float, float]]) -> str:
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for name, self_ms, cumulative_ms in timings:
+        lines.append(f"{cumulative_ms:>14.1f} {self_ms:>9.1f}  {name}")
+    return "\n".join(lines)
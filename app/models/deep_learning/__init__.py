@@ -0,0 +1,13 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .recommendation_model import VideoRecommenderDNN
+
+__all__ = ['VideoRecommenderDNN']
+
+def __getattr__(name):
+    # torch is only imported once the model is used
+    if name == 'VideoRecommenderDNN':
+        from .recommendation_model import VideoRecommenderDNN
+        return VideoRecommenderDNN
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
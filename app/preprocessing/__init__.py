@@ -1,3 +1,13 @@
-from .data_processor import DataPreprocessor
+from typing import TYPE_CHECKING
 
-__all__ = ['DataPreprocessor']
\ No newline at end of file
+if TYPE_CHECKING:
+    from .data_processor import DataPreprocessor
+
+__all__ = ['DataPreprocessor']
+
+def __getattr__(name):
+    # pandas and scikit-learn are only imported once the preprocessor is used
+    if name == 'DataPreprocessor':
+        from .data_processor import DataPreprocessor
+        return DataPreprocessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
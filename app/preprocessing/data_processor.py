@@ -3,6 +3,8 @@ import numpy as np
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from typing import Dict, List, Tuple
 
+from app.core.moods import MOOD_FEATURES, DEFAULT_MOOD_FEATURES
+
 class DataPreprocessor:
     def __init__(self):
         self.user_encoder = LabelEncoder()
@@ -53,13 +55,4 @@ class DataPreprocessor:
         """
         Process mood-based features for cold start recommendations
         """
-        # Define mood embeddings or features
-        mood_features = {
-            'happy': [1.0, 0.8, 0.6],
-            'motivated': [0.9, 1.0, 0.7],
-            'relaxed': [0.5, 0.3, 1.0],
-            'focused': [0.8, 0.9, 0.4],
-            'energetic': [1.0, 0.9, 0.8]
-        }
-        
-        return np.array(mood_features.get(mood.lower(), [0.5, 0.5, 0.5]))
\ No newline at end of file
+        return np.array(MOOD_FEATURES.get(mood.lower(), DEFAULT_MOOD_FEATURES))
\ No newline at end of file
@@ -1,3 +1,5 @@
 from .recommendation_service import RecommendationService
+from .mood_index import MoodIndex
+from .watch_history import WatchHistory
 
-__all__ = ['RecommendationService']
\ No newline at end of file
+__all__ = ['RecommendationService', 'MoodIndex', 'WatchHistory']
\ No newline at end of file
@@ -0,0 +1,82 @@
+from typing import Optional, Sequence, Tuple
+import numpy as np
+
+from app.core.moods import DEFAULT_MOOD_FEATURES, MOOD_CATEGORIES
+
+class MoodIndex:
+    """
+    Catalogue of videos with their mood vectors, ranked by cosine similarity
+    """
+    def __init__(
+        self,
+        video_ids: Sequence[str],
+        categories: Sequence[str],
+        vectors: Sequence[Sequence[float]]
+    ):
+        self.video_ids = np.asarray(video_ids, dtype=object)
+        self.categories = np.asarray(categories, dtype=object)
+        self.category_codes = np.array(
+            [MOOD_CATEGORIES.index(category) for category in categories], dtype=np.uint8
+        )
+        # One row per video, unit length, so a single matrix-vector
+        # product gives the cosine similarity against every video
+        self.matrix = np.ascontiguousarray(self._normalize(vectors), dtype=np.float32)
+
+    @classmethod
+    def from_platform(cls, platform: dict) -> "MoodIndex":
+        """
+        Build the index from a platform entry of the recommendation service
+        """
+        video_ids, categories, vectors = [], [], []
+        for category, videos in platform["mood_videos"].items():
+            for video_id in videos:
+                video_ids.append(video_id)
+                categories.append(category)
+                vectors.append(platform["video_moods"][video_id])
+        return cls(video_ids, categories, vectors)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def embed(self, features: Sequence[float]) -> np.ndarray:
+        """
+        Embed raw mood features into the space of the index
+        """
+        return self._normalize(np.asarray(features, dtype=np.float32)[None, :])[0]
+
+    def top_k(
+        self,
+        query: np.ndarray,
+        k: int,
+        exclude: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rows and scores of the k videos closest to an embedded mood,
+        best first, skipping rows set in the boolean exclude mask
+        """
+        scores = self.matrix @ query
+        if exclude is not None:
+            scores = np.where(exclude, -np.inf, scores).astype(np.float32)
+            k = min(k, len(scores) - int(np.count_nonzero(exclude)))
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        # argpartition selects the top k in O(N); only those k get sorted
+        if k < len(scores):
+            rows = np.argpartition(-scores, k - 1)[:k]
+        else:
+            rows = np.arange(len(scores))
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return rows, scores[rows]
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """
+        Centre features on the neutral mood and scale rows to unit length
+        """
+        # Raw features all live in [0, 1]^3, so without centring every pair
+        # of moods would look alike
+        centred = np.asarray(vectors, dtype=np.float32) - np.asarray(DEFAULT_MOOD_FEATURES, dtype=np.float32)
+        norms = np.linalg.norm(centred, axis=1, keepdims=True)
+        return centred / np.maximum(norms, 1e-6)
@@ -1,9 +1,40 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from collections import OrderedDict
+import asyncio
+import json
+import logging
 import random
+import re
+import threading
+import zlib
+import numpy as np
+
+from app.core.config import settings
+from app.core.admission import degraded_mode
+from app.core.concurrency import run_cpu_bound
+from app.core.moods import MOOD_FEATURES, MOOD_CATEGORY_FEATURES
+from app.models.user import User
+from app.cache.tiered_cache import TieredRecommendationCache
+from .mood_index import MoodIndex
+from .watch_history import WatchHistory
+from .reranking import embeddings_from_model, mmr_rerank
+
+logger = logging.getLogger(__name__)
+
+# Most recommendations a single request can ask for
+MAX_RECOMMENDATIONS = 50
 
 class RecommendationService:
-    def __init__(self):
+    def __init__(
+        self,
+        ranking_mode: Optional[str] = None,
+        cache: Optional[TieredRecommendationCache] = None
+    ):
+        # "embedding" ranks the catalogue by mood similarity,
+        # "category" picks at random within the mood category
+        self.ranking_mode = ranking_mode or settings.MOOD_RANKING_MODE
+        self.cache = cache
         self.current_time = datetime.strptime("2025-03-02 06:59:00", "%Y-%m-%d %H:%M:%S")
         self.current_user = "VarshithGaddam"
         
@@ -59,10 +90,115 @@ class RecommendationService:
                         "1ZYbU82GVz4",     # Productive Music
                         "goGNJ6hzUHk"      # Brain Power
                     ]
+                },
+                # Mood features (valence, energy, calm) of every video
+                "video_moods": {
+                    "ZbZSe6N_BXs": [1.0, 0.8, 0.6],
+                    "pRpeEdMmmQ0": [0.95, 1.0, 0.4],
+                    "ru0K8uYEZWw": [1.0, 0.9, 0.6],
+                    "09R8_2nJtjg": [0.9, 0.95, 0.5],
+                    "y6Sxv-sUYtM": [0.95, 0.7, 0.7],
+                    "kXYiU_JCYtU": [0.15, 0.8, 0.1],
+                    "eVTXPUF4Oz4": [0.2, 0.7, 0.2],
+                    "04854XqcfCY": [0.3, 0.6, 0.3],
+                    "CdXesX6mYUE": [0.2, 0.2, 0.6],
+                    "gH476CxJxfg": [0.1, 0.2, 0.4],
+                    "5qap5aO4i9A": [0.6, 0.3, 1.0],
+                    "DWcJFNfaw9c": [0.6, 0.5, 0.9],
+                    "lTRiuFIWV54": [0.55, 0.45, 0.9],
+                    "1vx8iUvfyCY": [0.5, 0.2, 1.0],
+                    "goyZbut_KFY": [0.55, 0.25, 0.95],
+                    "JGwWNGJdvx8": [0.8, 0.3, 0.6],
+                    "0E4Crx1PXJQ": [0.75, 0.3, 0.5],
+                    "450p7goxZqg": [0.6, 0.4, 0.3],
+                    "Y8HOfcYWZoo": [0.8, 0.2, 0.6],
+                    "rtOvBOTyX00": [0.85, 0.3, 0.65],
+                    "DVg2EJvvlF8": [0.5, 0.5, 0.9],
+                    "6kVlZAc6v3g": [0.6, 0.8, 0.7],
+                    "v7xUxQsLPDw": [0.55, 0.7, 0.8],
+                    "1ZYbU82GVz4": [0.7, 0.8, 0.6],
+                    "goGNJ6hzUHk": [0.6, 0.9, 0.7]
                 }
             }
         }
 
+        # The catalogue index is built on first use or by warm_up
+        self._mood_index: Optional[MoodIndex] = None
+        self._catalogue_lock = threading.Lock()
+        
+        # Optional video embeddings, one row per catalogue video (see
+        # load_video_embeddings), used to diversify rankings; the mood
+        # vectors are used when unset
+        self.video_embeddings: Optional[np.ndarray] = None
+        self._ranking_fingerprint: Optional[str] = None
+        
+        # Top picks per mood category, for degraded mode
+        self._precomputed: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        
+        # Per-user watch history bitmaps and preferred moods, by user id,
+        # least recently used first and capped like the user store's cache
+        self.user_profiles: "OrderedDict[int, dict]" = OrderedDict()
+        self.max_user_profiles = settings.USER_CACHE_MAX_SIZE
+
+    @property
+    def mood_index(self) -> MoodIndex:
+        if self._mood_index is None:
+            with self._catalogue_lock:
+                if self._mood_index is None:
+                    self._mood_index = MoodIndex.from_platform(self.video_platforms["youtube"])
+        return self._mood_index
+
+    @property
+    def ranking_fingerprint(self) -> str:
+        """
+        Checksum of the catalogue and ranking settings. It is part of every
+        cache key, so lists ranked before a catalogue or settings change are
+        never served, however long the shared cache file has been around.
+        """
+        if self._ranking_fingerprint is None:
+            state = json.dumps(
+                [
+                    self.video_platforms,
+                    self.base_moods,
+                    MOOD_FEATURES,
+                    MOOD_CATEGORY_FEATURES,
+                    settings.MOOD_PREFERENCE_WEIGHT,
+                    settings.DIVERSITY_WEIGHT,
+                    settings.DIVERSITY_POOL_FACTOR
+                ],
+                sort_keys=True
+            )
+            checksum = zlib.crc32(state.encode())
+            if self.video_embeddings is not None:
+                checksum = zlib.crc32(np.ascontiguousarray(self.video_embeddings).tobytes(), checksum)
+            self._ranking_fingerprint = f"{checksum:08x}"
+        return self._ranking_fingerprint
+
+    @property
+    def is_warm(self) -> bool:
+        return self._mood_index is not None
+
+    def warm_up(self):
+        """
+        Load the catalogue, run one ranking so the first request is not slow
+        and precompute the picks served in degraded mode
+        """
+        self._rank_by_mood(self._embed_mood("balanced"), 1)
+        for mood_category in self.base_moods:
+            self._precomputed_rows(mood_category)
+
+    def load_video_embeddings(self, model, video_encoder=None):
+        """
+        Diversify rankings by a trained VideoRecommenderDNN's video
+        embeddings. Catalogue row r is video id r + 1, the id served in
+        recommendations and kept in watch histories; video_encoder maps
+        those ids to the model's indices as in reranking.embeddings_from_model.
+        Process executor workers only see embeddings loaded before startup.
+        """
+        video_ids = np.arange(1, len(self.mood_index) + 1)
+        self.video_embeddings = embeddings_from_model(model, video_ids, video_encoder)
+        self._ranking_fingerprint = None
+
     def _categorize_mood(self, mood: str) -> str:
         """
         Categorize any given mood into one of the base categories
@@ -90,136 +226,438 @@ class RecommendationService:
         # Default to neutral if no match found
         return "neutral"
 
-    async def get_mood_based_recommendations(
+    def _embed_mood(self, mood: str) -> np.ndarray:
+        """
+        Embed any mood, including blends such as "happy and relaxed"
+        """
+        mood = mood.lower()
+        features = []
+        for word in re.findall(r"[a-z]+", mood):
+            if word in MOOD_FEATURES:
+                features.append(MOOD_FEATURES[word])
+            elif any(word in moods for moods in self.base_moods.values()):
+                features.append(MOOD_CATEGORY_FEATURES[self._categorize_mood(word)])
+
+        # Unknown moods fall back to the anchor of their category
+        if not features:
+            features.append(MOOD_CATEGORY_FEATURES[self._categorize_mood(mood)])
+
+        return self.mood_index.embed(np.mean(features, axis=0))
+
+    def set_user_profile(self, user: User, watch_bitmap: bytes):
+        """
+        Store the watch history, as a packed bitmap from the user store, and
+        mood preferences used to personalize recommendations for a user
+        """
+        # The user store hands back the same object until the user changes,
+        # so the watch history bitmap is only rebuilt when it has to be
+        profile = self._get_profile(user.id)
+        if profile and profile["user"] is user:
+            return
+        
+        # Remove oldest profile if full
+        if user.id not in self.user_profiles and len(self.user_profiles) >= self.max_user_profiles:
+            self.user_profiles.popitem(last=False)
+        
+        watch_history = WatchHistory.from_bytes(watch_bitmap, len(self.mood_index))
+        mood_preferences = list(user.mood_preferences)
+        self.user_profiles[user.id] = {
+            "user": user,
+            "watch_history": watch_history,
+            "mood_preferences": mood_preferences,
+            # Checksum of everything that personalizes a ranking, the same
+            # in every worker, so cached lists change whenever it does
+            "stamp": zlib.crc32("\x1f".join(mood_preferences).encode(), zlib.crc32(watch_history.to_bytes()))
+        }
+        self.user_profiles.move_to_end(user.id)
+
+    def _get_profile(self, user_id: Optional[int]) -> Optional[dict]:
+        """
+        Get the stored profile of a user, marking it as recently used
+        """
+        profile = self.user_profiles.get(user_id)
+        if profile is not None:
+            self.user_profiles.move_to_end(user_id)
+        return profile
+
+    def _ranking_inputs(
         self,
         mood: str,
-        limit: int = 10
+        user_id: Optional[int] = None
+    ) -> Tuple[Optional[np.ndarray], Optional[WatchHistory]]:
+        """
+        Get the embedded query of a request, or None when picking at random,
+        and the user's watch history: all the per-user state ranking needs
+        """
+        profile = self._get_profile(user_id)
+        watched = profile["watch_history"] if profile else None
+        if self.ranking_mode != "embedding":
+            return None, watched
+        
+        query = self._embed_mood(mood)
+        # Boost preferred moods by pulling the query towards them
+        if profile and profile["mood_preferences"]:
+            preference = self._embed_mood(" ".join(profile["mood_preferences"]))
+            query = query + settings.MOOD_PREFERENCE_WEIGHT * preference
+            query = query / max(float(np.linalg.norm(query)), 1e-6)
+        return query, watched
+
+    def _rank_by_mood(
+        self,
+        query: np.ndarray,
+        limit: int,
+        watched: Optional[WatchHistory] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rows and scores of the catalogue videos closest to an
+        embedded mood, skipping watched videos
+        """
+        exclude = watched.mask() if watched is not None else None
+        # As in _pick_from_category, repeat watched videos rather than
+        # return nothing
+        if exclude is not None and exclude.all():
+            exclude = None
+        
+        diversity = settings.DIVERSITY_WEIGHT
+        if diversity <= 0 or limit < 2:
+            rows, scores = self.mood_index.top_k(query, limit, exclude)
+        else:
+            # Re-rank a larger candidate pool so near-duplicates don't crowd
+            # out everything else
+            rows, scores = self.mood_index.top_k(query, limit * settings.DIVERSITY_POOL_FACTOR, exclude)
+            embeddings = self.video_embeddings if self.video_embeddings is not None else self.mood_index.matrix
+            picked = mmr_rerank(embeddings[rows], scores, limit, diversity)
+            rows, scores = rows[picked], scores[picked]
+        
+        return rows, scores
+
+    def _precomputed_rows(self, mood_category: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rows and scores of the best catalogue videos for a mood
+        category, ranked once and reused
+        """
+        ranked = self._precomputed.get(mood_category)
+        if ranked is None:
+            query = self.mood_index.embed(MOOD_CATEGORY_FEATURES[mood_category])
+            ranked = self.mood_index.top_k(query, MAX_RECOMMENDATIONS)
+            self._precomputed[mood_category] = ranked
+        return ranked
+
+    def _pick_from_category(
+        self,
+        mood_category: str,
+        limit: int,
+        watched: Optional[WatchHistory] = None
+    ) -> np.ndarray:
+        """
+        Get the rows of catalogue videos picked at random within a mood category
+        """
+        rows = np.flatnonzero(self.mood_index.categories == mood_category)
+        
+        if watched is not None:
+            unwatched = rows[~watched.mask()[rows]]
+            # Repeat watched videos rather than return nothing
+            if len(unwatched):
+                rows = unwatched
+        
+        return np.array([random.choice(rows) for _ in range(limit)], dtype=np.intp)
+
+    def _select(
+        self,
+        mood: str,
+        limit: int,
+        query: Optional[np.ndarray] = None,
+        watched: Optional[WatchHistory] = None,
+        precomputed: bool = False
+    ) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Get the rows of the videos to recommend for a mood and their
+        similarity scores, or None for scores when picked at random
+        """
+        mood_category = self._categorize_mood(mood)
+        if precomputed:
+            rows, scores = self._precomputed_rows(mood_category)
+            return rows[:limit], scores[:limit]
+        if query is not None:
+            return self._rank_by_mood(query, limit, watched)
+        return self._pick_from_category(mood_category, limit, watched), None
+
+    def _score_arrays(
+        self,
+        mood: str,
+        limit: int,
+        query: Optional[np.ndarray] = None,
+        watched: Optional[WatchHistory] = None,
+        precomputed: bool = False
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the video ids, engagement scores and category codes to
+        recommend as arrays, without building any per-video objects
+        """
+        rows, scores = self._select(mood, limit, query, watched, precomputed)
+        if scores is None:
+            engagement = 0.95 - np.arange(len(rows), dtype=np.float32) * 0.02
+        else:
+            # Similarity scores are cosines, mapped here to [0, 1]
+            engagement = (scores + 1) / 2
+        return (
+            (rows + 1).astype(np.uint32),
+            engagement.astype(np.float32),
+            self.mood_index.category_codes[rows]
+        )
+
+    def _resolve_mood(self, user_id: int, mood: Optional[str]) -> str:
+        """
+        Get the requested mood, or the user's preferred moods when none is given
+        """
+        if mood is not None:
+            return mood
+        profile = self._get_profile(user_id)
+        if profile and profile["mood_preferences"]:
+            return " ".join(profile["mood_preferences"])
+        return "balanced"
+
+    async def get_recommendations(
+        self,
+        user_id: int,
+        limit: int = 10,
+        mood: Optional[str] = None
     ) -> List[dict]:
         """
-        Get recommendations for any mood
+        Get personalized recommendations for a user, for their preferred
+        moods unless a mood is given
+        """
+        mood = self._resolve_mood(user_id, mood)
+        return await self.get_mood_based_recommendations(mood, limit, user_id=user_id)
+
+    async def get_recommendation_scores(
+        self,
+        user_id: int,
+        limit: int = 10,
+        mood: Optional[str] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get personalized recommendations as id, score and category code
+        arrays, for the binary response format
+        """
+        mood = self._resolve_mood(user_id, mood)
+        return await self.get_mood_based_scores(mood, limit, user_id=user_id)
+
+    async def get_mood_based_scores(
+        self,
+        mood: str,
+        limit: int = 10,
+        user_id: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get recommendations for any mood as id, score and category code
+        arrays, for the binary response format
         """
         try:
-            mood_category = self._categorize_mood(mood)
-            platform = self.video_platforms["youtube"]
-            recommendations = []
+            if degraded_mode.get():
+                return self._score_arrays(mood, limit, precomputed=True)
+            query, watched = self._ranking_inputs(mood, user_id)
+            return await run_cpu_bound(score_arrays, mood, limit, query, watched, self._cpu_service())
             
-            # Content templates based on mood category
-            templates = {
-                "positive": {
-                    "titles": [
-                        "Feel Good Vibes: {mood}",
-                        "Uplifting Moments: {mood}",
-                        "Happy Times: {mood}",
-                        "Positive Energy: {mood}"
-                    ],
-                    "descriptions": [
-                        "Boost your mood with amazing content for {mood} feelings.",
-                        "Perfect playlist for when you're feeling {mood}.",
-                        "Keep the good vibes going with {mood} content.",
-                        "Enhance your {mood} energy with these picks."
-                    ]
-                },
-                "negative": {
-                    "titles": [
-                        "Finding Peace: {mood}",
-                        "Healing Moments: {mood}",
-                        "Understanding: {mood}",
-                        "Path to Calm: {mood}"
-                    ],
-                    "descriptions": [
-                        "Transform your {mood} energy into something positive.",
-                        "Find understanding and peace when feeling {mood}.",
-                        "Let the music help you process {mood} feelings.",
-                        "Journey from {mood} to calm with these selections."
-                    ]
-                },
-                "neutral": {
-                    "titles": [
-                        "Balance & Harmony: {mood}",
-                        "Peaceful Moments: {mood}",
-                        "Mindful State: {mood}",
-                        "Centered Energy: {mood}"
-                    ],
-                    "descriptions": [
-                        "Maintain your {mood} state with balanced content.",
-                        "Perfect for a {mood} mindset and focused energy.",
-                        "Stay centered and {mood} with these picks.",
-                        "Enhance your {mood} state with mindful content."
-                    ]
-                },
-                "emotional": {
-                    "titles": [
-                        "Heart & Soul: {mood}",
-                        "Emotional Journey: {mood}",
-                        "Feel Deep: {mood}",
-                        "Soul Touch: {mood}"
-                    ],
-                    "descriptions": [
-                        "Connect with your {mood} feelings through music.",
-                        "Express your {mood} emotions with these selections.",
-                        "Perfect for deep {mood} moments.",
-                        "Let the music match your {mood} heart."
-                    ]
-                },
-                "mental": {
-                    "titles": [
-                        "Mind Space: {mood}",
-                        "Mental Clarity: {mood}",
-                        "Think Clear: {mood}",
-                        "Brain Waves: {mood}"
-                    ],
-                    "descriptions": [
-                        "Clear your mind while feeling {mood}.",
-                        "Perfect for {mood} thinking and focus.",
-                        "Enhance your {mood} mental state.",
-                        "Optimize your {mood} thought process."
-                    ]
-                }
-            }
+        except (TimeoutError, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            logger.error(f"Error in get_mood_based_scores: {str(e)}")
+            raise Exception(f"Failed to generate mood-based recommendations: {str(e)}")
+
+    async def get_mood_based_recommendations(
+        self,
+        mood: str,
+        limit: int = 10,
+        user_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Get recommendations for any mood, skipping videos the user has
+        already watched
+        """
+        try:
+            cache_key = self._cache_key(mood, limit, user_id)
+            if self.cache is not None:
+                recommendations = self.cache.get_recommendations(cache_key)
+                if recommendations is not None:
+                    return recommendations
             
-            template = templates[mood_category]
+            # Precomputed picks need no ranking, so they are built inline and
+            # not cached, to be replaced by ranked ones once the load drops
+            if degraded_mode.get():
+                return self._build_mood_recommendations(mood, limit, precomputed=True)
             
-            for i in range(limit):
-                video_id = random.choice(platform["mood_videos"][mood_category])
-                
-                video = {
-                    "id": i + 1,
-                    "title": random.choice(template["titles"]).format(mood=mood),
-                    "description": random.choice(template["descriptions"]).format(mood=mood),
-                    "url": platform["video_url"].format(video_id=video_id),
-                    "thumbnail_url": platform["thumbnail_url"].format(video_id=video_id),
-                    "embed_url": platform["embed_url"].format(video_id=video_id),
-                    "duration": random.randint(180, 600),  # 3-10 minutes
-                    "category": mood_category.capitalize(),
-                    "platform": "youtube",
-                    "tags": [
-                        mood.lower(),
-                        mood_category,
-                        "recommended",
-                        f"{mood}_content"
-                    ],
-                    "mood_tags": [mood.lower(), mood_category],
-                    "engagement_score": round(0.95 - (i * 0.02), 2),
-                    "created_at": self.current_time.isoformat(),
-                    "metadata": {
-                        "recommended_by": self.current_user,
-                        "recommendation_time": self.current_time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "mood_type": mood,
-                        "mood_category": mood_category,
-                        "content_type": f"{mood}_content",
-                        "platform": "youtube",
-                        "quality": "HD"
-                    }
-                }
-                
-                recommendations.append(video)
+            # Ranking and building run on the CPU executor, off the event loop
+            query, watched = self._ranking_inputs(mood, user_id)
+            recommendations = await run_cpu_bound(
+                build_mood_recommendations, mood, limit, query, watched, self._cpu_service()
+            )
             
+            if self.cache is not None:
+                self.cache.store_recommendations(cache_key, recommendations)
             return recommendations
             
+        except (TimeoutError, asyncio.TimeoutError):
+            raise
         except Exception as e:
             print(f"Error in get_mood_based_recommendations: {str(e)}")
             raise Exception(f"Failed to generate mood-based recommendations: {str(e)}")
 
+    def _cpu_service(self) -> Optional["RecommendationService"]:
+        """
+        The service CPU-bound work runs on: this one when it runs in this
+        process, None for process executor workers, which use their own
+        """
+        return None if settings.CPU_EXECUTOR == "process" else self
+
+    def _cache_key(self, mood: str, limit: int, user_id: Optional[int]) -> str:
+        """
+        Cache key for a request, changing whenever the user's profile, the
+        catalogue or the ranking settings do
+        """
+        profile = self._get_profile(user_id)
+        profile_stamp = f"{profile['stamp']:08x}" if profile else ""
+        return f"{self.ranking_fingerprint}:{self.ranking_mode}:{user_id}:{profile_stamp}:{mood.lower()}:{limit}"
+
+    def _build_mood_recommendations(
+        self,
+        mood: str,
+        limit: int,
+        query: Optional[np.ndarray] = None,
+        watched: Optional[WatchHistory] = None,
+        precomputed: bool = False
+    ) -> List[dict]:
+        """
+        Rank and build the recommendations for a mood; CPU-bound unless
+        using the precomputed picks of the mood category
+        """
+        mood_category = self._categorize_mood(mood)
+        platform = self.video_platforms["youtube"]
+        recommendations = []
+        
+        # Content templates based on mood category
+        templates = {
+            "positive": {
+                "titles": [
+                    "Feel Good Vibes: {mood}",
+                    "Uplifting Moments: {mood}",
+                    "Happy Times: {mood}",
+                    "Positive Energy: {mood}"
+                ],
+                "descriptions": [
+                    "Boost your mood with amazing content for {mood} feelings.",
+                    "Perfect playlist for when you're feeling {mood}.",
+                    "Keep the good vibes going with {mood} content.",
+                    "Enhance your {mood} energy with these picks."
+                ]
+            },
+            "negative": {
+                "titles": [
+                    "Finding Peace: {mood}",
+                    "Healing Moments: {mood}",
+                    "Understanding: {mood}",
+                    "Path to Calm: {mood}"
+                ],
+                "descriptions": [
+                    "Transform your {mood} energy into something positive.",
+                    "Find understanding and peace when feeling {mood}.",
+                    "Let the music help you process {mood} feelings.",
+                    "Journey from {mood} to calm with these selections."
+                ]
+            },
+            "neutral": {
+                "titles": [
+                    "Balance & Harmony: {mood}",
+                    "Peaceful Moments: {mood}",
+                    "Mindful State: {mood}",
+                    "Centered Energy: {mood}"
+                ],
+                "descriptions": [
+                    "Maintain your {mood} state with balanced content.",
+                    "Perfect for a {mood} mindset and focused energy.",
+                    "Stay centered and {mood} with these picks.",
+                    "Enhance your {mood} state with mindful content."
+                ]
+            },
+            "emotional": {
+                "titles": [
+                    "Heart & Soul: {mood}",
+                    "Emotional Journey: {mood}",
+                    "Feel Deep: {mood}",
+                    "Soul Touch: {mood}"
+                ],
+                "descriptions": [
+                    "Connect with your {mood} feelings through music.",
+                    "Express your {mood} emotions with these selections.",
+                    "Perfect for deep {mood} moments.",
+                    "Let the music match your {mood} heart."
+                ]
+            },
+            "mental": {
+                "titles": [
+                    "Mind Space: {mood}",
+                    "Mental Clarity: {mood}",
+                    "Think Clear: {mood}",
+                    "Brain Waves: {mood}"
+                ],
+                "descriptions": [
+                    "Clear your mind while feeling {mood}.",
+                    "Perfect for {mood} thinking and focus.",
+                    "Enhance your {mood} mental state.",
+                    "Optimize your {mood} thought process."
+                ]
+            }
+        }
+        
+        template = templates[mood_category]
+        
+        rows, scores = self._select(mood, limit, query, watched, precomputed)
+        scores = scores.tolist() if scores is not None else [None] * len(rows)
+        
+        for i, (row, score) in enumerate(zip(rows.tolist(), scores)):
+            video_id = self.mood_index.video_ids[row]
+            video_category = self.mood_index.categories[row]
+
+            # Similarity scores are cosines, mapped here to [0, 1]
+            if score is not None:
+                engagement_score = round((score + 1) / 2, 2)
+            else:
+                engagement_score = round(0.95 - (i * 0.02), 2)
+            
+            video = {
+                "id": row + 1,
+                "title": random.choice(template["titles"]).format(mood=mood),
+                "description": random.choice(template["descriptions"]).format(mood=mood),
+                "url": platform["video_url"].format(video_id=video_id),
+                "thumbnail_url": platform["thumbnail_url"].format(video_id=video_id),
+                "embed_url": platform["embed_url"].format(video_id=video_id),
+                "duration": random.randint(180, 600),  # 3-10 minutes
+                "category": video_category.capitalize(),
+                "platform": "youtube",
+                "tags": [
+                    mood.lower(),
+                    mood_category,
+                    "recommended",
+                    f"{mood}_content"
+                ],
+                "mood_tags": [mood.lower(), mood_category],
+                "engagement_score": engagement_score,
+                "created_at": self.current_time.isoformat(),
+                "metadata": {
+                    "recommended_by": self.current_user,
+                    "recommendation_time": self.current_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "mood_type": mood,
+                    "mood_category": mood_category,
+                    "content_type": f"{mood}_content",
+                    "platform": "youtube",
+                    "quality": "HD"
+                }
+            }
+            
+            recommendations.append(video)
+        
+        return recommendations
+
     def get_supported_moods(self) -> dict:
         """
         Get information about all supported moods
@@ -235,4 +673,41 @@ class RecommendationService:
             "all_supported_moods": sorted(all_moods),
             "mood_categories": self.base_moods,
             "total_moods": len(all_moods)
-        }
\ No newline at end of file
+        }
+
+# Service of a process executor worker, built once by init_cpu_worker so
+# requests only ship their query and watch history to the worker
+_worker_service: Optional[RecommendationService] = None
+
+def init_cpu_worker(ranking_mode: str, video_embeddings: Optional[np.ndarray] = None):
+    """
+    Build the catalogue of a process executor worker
+    """
+    global _worker_service
+    _worker_service = RecommendationService(ranking_mode)
+    _worker_service.video_embeddings = video_embeddings
+    _worker_service.warm_up()
+
+def build_mood_recommendations(
+    mood: str,
+    limit: int,
+    query: Optional[np.ndarray],
+    watched: Optional[WatchHistory],
+    service: Optional[RecommendationService] = None
+) -> List[dict]:
+    """
+    Rank and build the recommendations for a mood on the CPU executor
+    """
+    return (service or _worker_service)._build_mood_recommendations(mood, limit, query, watched)
+
+def score_arrays(
+    mood: str,
+    limit: int,
+    query: Optional[np.ndarray],
+    watched: Optional[WatchHistory],
+    service: Optional[RecommendationService] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rank a mood into id, score and category code arrays on the CPU executor
+    """
+    return (service or _worker_service)._score_arrays(mood, limit, query, watched)
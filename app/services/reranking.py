@@ -0,0 +1,70 @@
+from typing import Sequence
+import numpy as np
+
+def mmr_rerank(
+    embeddings: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    diversity: float = 0.3
+) -> np.ndarray:
+    """
+    Re-rank candidates by maximal marginal relevance and get the positions
+    of the k picked, in pick order.
+
+    Each pick maximizes (1 - diversity) * relevance - diversity * (highest
+    cosine similarity to anything already picked). The highest similarities
+    are updated with one matrix-vector product per pick, so the whole
+    re-rank is O(k * N * d) in numpy and O(k) in Python.
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    relevance = np.asarray(relevance, dtype=np.float32)
+    if diversity <= 0:
+        return np.argsort(-relevance, kind="stable")[:k]
+
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-6)
+    # Scaled and transposed once so each pick's penalty is a single
+    # vector-matrix product over contiguous rows
+    penalty_vectors = np.ascontiguousarray((diversity * vectors).T)
+    relevance_part = (1.0 - diversity) * relevance
+
+    # MMR score of every candidate; only ever decreases as picks are made
+    scores = np.full(n, np.inf, dtype=np.float32)
+    penalty = np.empty_like(scores)
+    picked = np.empty(k, dtype=np.intp)
+
+    # The first pick has nothing to be similar to
+    best = int(np.argmax(relevance_part))
+    for i in range(k):
+        picked[i] = best
+        # Never pick the same candidate twice
+        relevance_part[best] = -np.inf
+        if i == k - 1:
+            break
+        np.dot(vectors[best], penalty_vectors, out=penalty)
+        np.subtract(relevance_part, penalty, out=penalty)
+        np.minimum(scores, penalty, out=scores)
+        best = int(np.argmax(scores))
+
+    return picked
+
+def embeddings_from_model(model, video_ids: Sequence[int], video_encoder=None) -> np.ndarray:
+    """
+    Get the VideoRecommenderDNN embeddings of videos as a float32 matrix,
+    one row per id in video_ids and in the same order.
+
+    The model indexes its embedding table by encoded video id. Pass the
+    fitted encoder used in training (e.g. DataPreprocessor.video_encoder)
+    to map video_ids to those indices; without one the ids are used as
+    indices directly.
+    """
+    import torch
+
+    indices = video_encoder.transform(video_ids) if video_encoder is not None else video_ids
+    with torch.no_grad():
+        indices = torch.as_tensor(np.asarray(indices), dtype=torch.long)
+        return model.get_video_embedding(indices).cpu().numpy().astype(np.float32)
@@ -0,0 +1,60 @@
+from typing import Iterable, Optional
+import numpy as np
+
+class WatchHistory:
+    """
+    Compact bitmap of the catalogue rows a user has already watched
+    """
+    def __init__(self, num_videos: int, bits: Optional[np.ndarray] = None):
+        self.num_videos = num_videos
+        # One bit per catalogue row, packed eight to a byte
+        if bits is None:
+            bits = np.zeros((num_videos + 7) // 8, dtype=np.uint8)
+        self.bits = bits
+
+    @classmethod
+    def from_video_ids(cls, video_ids: Iterable[int], num_videos: int) -> "WatchHistory":
+        """
+        Build the bitmap from catalogue video ids (row + 1)
+        """
+        history = cls(num_videos)
+        history.add(video_ids)
+        return history
+
+    @classmethod
+    def from_bytes(cls, data: bytes, num_videos: int) -> "WatchHistory":
+        """
+        Restore a bitmap serialized with to_bytes
+        """
+        history = cls(num_videos)
+        size = min(len(data), len(history.bits))
+        history.bits[:size] = np.frombuffer(data, dtype=np.uint8, count=size)
+        return history
+
+    def to_bytes(self) -> bytes:
+        return self.bits.tobytes()
+
+    def add(self, video_ids: Iterable[int]):
+        """
+        Mark videos as watched, ignoring ids outside the catalogue
+        """
+        rows = np.fromiter(video_ids, dtype=np.int64) - 1
+        rows = rows[(rows >= 0) & (rows < self.num_videos)]
+        mask = self.mask()
+        mask[rows] = True
+        self.bits = np.packbits(mask)
+
+    def mask(self) -> np.ndarray:
+        """
+        Get a boolean array with True for every watched catalogue row
+        """
+        return np.unpackbits(self.bits, count=self.num_videos).view(bool)
+
+    def __contains__(self, video_id: int) -> bool:
+        row = video_id - 1
+        if row < 0 or row >= self.num_videos:
+            return False
+        return bool(self.bits[row >> 3] & (0x80 >> (row & 7)))
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self.bits, count=self.num_videos).sum())
@@ -0,0 +1,3 @@
+from .user_store import UserStore
+
+__all__ = ['UserStore']
\ No newline at end of file
@@ -0,0 +1,267 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import json
+import queue
+import sqlite3
+import time
+import numpy as np
+
+from app.models.user import User
+from app.services.watch_history import WatchHistory
+
+# SQLite limits the number of bound parameters per statement
+_MAX_BATCH = 500
+
+class UserStore:
+    """
+    SQLite-backed user profiles with a read-through LRU in front.
+
+    Blocking SQLite calls run on a bounded thread pool, one pooled
+    connection per worker, so the async methods never block the event loop.
+
+    Watch histories are kept as packed bitmaps (see get_watch_bitmap) and
+    never expanded back into ids: users read from the store have an empty
+    watch_history.
+
+    The LRU is per process and only sees this process's writes, so a user
+    written by another worker shows up once the cached copy is cache_ttl
+    seconds old.
+    """
+    def __init__(self, path: str, pool_size: int = 4, cache_size: int = 10000, cache_ttl: float = 60):
+        self.path = path
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        # User, packed watch history bitmap and expiry time, by user id
+        self.cache: "OrderedDict[int, Tuple[User, bytes, float]]" = OrderedDict()
+        self.username_ids: Dict[str, int] = {}
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="user-store")
+        self.connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self.connections.put(self._connect())
+
+        self._run(self._create_schema)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a connection in WAL mode so readers never wait on the writer
+        """
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self, fn, *args):
+        """
+        Run fn with a connection borrowed from the pool
+        """
+        conn = self.connections.get()
+        try:
+            return fn(conn, *args)
+        finally:
+            self.connections.put(conn)
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._run, fn, *args)
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    username TEXT NOT NULL UNIQUE,
+                    preferences TEXT NOT NULL,
+                    watch_history BLOB NOT NULL,  -- packed bitmap, bit id - 1
+                    mood_preferences TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    last_active TEXT NOT NULL
+                )
+                """
+            )
+
+    @staticmethod
+    def _pack_watch_history(video_ids) -> bytes:
+        """
+        Pack watched video ids into a bitmap, bit id - 1 per video
+        """
+        video_ids = np.asarray(video_ids, dtype=np.int64)
+        num_videos = int(video_ids.max()) if len(video_ids) else 0
+        return WatchHistory.from_video_ids(video_ids, num_videos).to_bytes()
+
+    @staticmethod
+    def _to_row(user: User) -> tuple:
+        return (
+            user.id,
+            user.username,
+            json.dumps(user.preferences or {}),
+            # Watch history as a packed bitmap, loaded without going through ids
+            UserStore._pack_watch_history(user.watch_history),
+            json.dumps(user.mood_preferences),
+            user.created_at.isoformat(),
+            user.last_active.isoformat()
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Tuple[User, bytes]:
+        # Rows were validated when written
+        user = User.model_construct(
+            id=row[0],
+            username=row[1],
+            preferences=json.loads(row[2]),
+            watch_history=[],
+            mood_preferences=json.loads(row[4]),
+            created_at=datetime.fromisoformat(row[5]),
+            last_active=datetime.fromisoformat(row[6])
+        )
+        return user, row[3]
+
+    @classmethod
+    def _select(cls, conn: sqlite3.Connection, column: str, keys: List) -> List[Tuple[User, bytes]]:
+        users = []
+        for start in range(0, len(keys), _MAX_BATCH):
+            batch = keys[start:start + _MAX_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT * FROM users WHERE {column} IN ({placeholders})", batch
+            ).fetchall()
+            users.extend(cls._from_row(row) for row in rows)
+        return users
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, rows: List[tuple]):
+        with conn:
+            # An empty watch history keeps the stored one
+            conn.executemany(
+                """
+                INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    username = excluded.username,
+                    preferences = excluded.preferences,
+                    watch_history = CASE
+                        WHEN length(excluded.watch_history) = 0 THEN users.watch_history
+                        ELSE excluded.watch_history
+                    END,
+                    mood_preferences = excluded.mood_preferences,
+                    created_at = excluded.created_at,
+                    last_active = excluded.last_active
+                """,
+                rows
+            )
+
+    def _cache_get(self, user_id: int) -> Optional[User]:
+        entry = self.cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[2] <= time.monotonic():
+            # Expired; re-read in case another worker changed the user
+            self._cache_discard(user_id)
+            return None
+        # Move to end to mark as recently used
+        self.cache.move_to_end(user_id)
+        return entry[0]
+
+    def _cache_store(self, user: User, watch_bitmap: bytes):
+        self._cache_discard(user.id)
+
+        # Remove oldest entry if cache is full
+        if len(self.cache) >= self.cache_size:
+            _, (oldest, _, _) = self.cache.popitem(last=False)
+            self.username_ids.pop(oldest.username, None)
+
+        self.cache[user.id] = (user, watch_bitmap, time.monotonic() + self.cache_ttl)
+        self.username_ids[user.username] = user.id
+
+    def _cache_discard(self, user_id: int):
+        entry = self.cache.pop(user_id, None)
+        if entry is not None:
+            self.username_ids.pop(entry[0].username, None)
+
+    def get_watch_bitmap(self, user_id: int) -> Optional[bytes]:
+        """
+        Get the packed watch history of a cached user, as read by
+        WatchHistory.from_bytes
+        """
+        entry = self.cache.get(user_id)
+        return entry[1] if entry is not None else None
+
+    async def get(self, user_id: int) -> Optional[User]:
+        """
+        Get a user by id, or None if unknown
+        """
+        users = await self.get_many([user_id])
+        return users.get(user_id)
+
+    async def get_by_username(self, username: str) -> Optional[User]:
+        """
+        Get a user by username, or None if unknown
+        """
+        user_id = self.username_ids.get(username)
+        if user_id is not None:
+            user = self._cache_get(user_id)
+            if user is not None:
+                return user
+
+        users = await self._submit(self._select, "username", [username])
+        for user, watch_bitmap in users:
+            self._cache_store(user, watch_bitmap)
+        return users[0][0] if users else None
+
+    async def get_many(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        """
+        Get many users at once, with one query for all cache misses.
+        Unknown ids are left out of the result.
+        """
+        found = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self._cache_get(user_id)
+            if user is not None:
+                found[user_id] = user
+            else:
+                missing.append(user_id)
+
+        if missing:
+            for user, watch_bitmap in await self._submit(self._select, "id", missing):
+                self._cache_store(user, watch_bitmap)
+                found[user.id] = user
+        return found
+
+    async def put(self, user: User):
+        """
+        Insert or replace a user
+        """
+        await self.put_many([user])
+
+    async def put_many(self, users: Iterable[User]):
+        """
+        Insert or replace many users in one transaction. Users with an
+        empty watch_history, as read from the store, keep their stored
+        watch history.
+        """
+        users = list(users)
+        rows = [self._to_row(user) for user in users]
+        await self._submit(self._upsert, rows)
+        for user, row in zip(users, rows):
+            watch_bitmap = row[3] or self.get_watch_bitmap(user.id)
+            if watch_bitmap is None:
+                # Stored watch history not known here; read it back on next use
+                self._cache_discard(user.id)
+            else:
+                self._cache_store(user.model_copy(update={"watch_history": []}), watch_bitmap)
+
+    def close(self):
+        """
+        Wait for pending work and close every pooled connection
+        """
+        self.executor.shutdown(wait=True)
+        while not self.connections.empty():
+            self.connections.get_nowait().close()
@@ -0,0 +1,41 @@
+"""
+Benchmark MMR re-ranking of model-sized candidate pools.
+
+Usage: python benchmarks/rerank_benchmark.py [candidates] [k] [embedding_dim]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.services.reranking import mmr_rerank
+
+def main():
+    candidates = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    embedding_dim = int(sys.argv[3]) if len(sys.argv) > 3 else 128
+    repeats = 200
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((candidates, embedding_dim)).astype(np.float32)
+    relevance = rng.random(candidates).astype(np.float32)
+
+    for diversity in (0.0, 0.3, 0.7):
+        mmr_rerank(embeddings, relevance, k, diversity)
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            mmr_rerank(embeddings, relevance, k, diversity)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        print(
+            f"{candidates} -> {k} (dim {embedding_dim}, diversity {diversity}): "
+            f"median {timings[len(timings) // 2] * 1e6:.0f} us, "
+            f"p95 {timings[int(len(timings) * 0.95)] * 1e6:.0f} us"
+        )
+
+if __name__ == "__main__":
+    main()
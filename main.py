@@ -1,6 +1,13 @@
+import time
+
+# Taken before any other import so the startup log covers all of them
+IMPORT_STARTED = time.perf_counter()
+
 import sys
 from pathlib import Path
 from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 
 # Add the project root directory to Python path
@@ -9,16 +16,21 @@ sys.path.append(str(project_root))
 
 from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.openapi.utils import get_openapi
 from typing import List, Optional, Dict, Any
-import uvicorn
 import traceback
 
 from app.models.recommendation import VideoRecommendation
 from app.models.user import User
-from app.services.recommendation_service import RecommendationService
-from app.core.config import Settings
+from app.models import binary_recommendations
+from app.services.recommendation_service import RecommendationService, init_cpu_worker
+from app.services.watch_history import WatchHistory
+from app.storage.user_store import UserStore
+from app.cache import RecommendationCache, SharedRecommendationCache, TieredRecommendationCache
+from app.core.config import Settings, settings
+from app.core.concurrency import LoopBlockMonitor, configure_cpu_executor, run_cpu_bound, shutdown_cpu_executor
+from app.core.admission import ConcurrencyLimiter, LatencyTracker, degraded_mode
 
 # Constants
 CURRENT_USER = "VarshithGaddam"
@@ -32,8 +44,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the user store and load the catalogue before serving, or in the
+    background when BACKGROUND_WARMUP is set
+    """
+    global user_store, warm_up_task
+    logger.info(f"Imports finished in {(time.perf_counter() - IMPORT_STARTED) * 1000:.0f} ms")
+    
+    # Process executor workers build their own catalogue once
+    configure_cpu_executor(
+        init_cpu_worker,
+        (recommendation_service.ranking_mode, recommendation_service.video_embeddings)
+    )
+    # Start the executor now rather than on the first request
+    await run_cpu_bound(int)
+    
+    loop_monitor = None
+    if settings.LOOP_BLOCK_THRESHOLD_MS > 0:
+        loop_monitor = LoopBlockMonitor(
+            asyncio.get_running_loop(),
+            threshold=settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+        ).start()
+    
+    user_store = UserStore(
+        settings.USER_STORE_PATH,
+        pool_size=settings.USER_STORE_POOL_SIZE,
+        cache_size=settings.USER_CACHE_MAX_SIZE,
+        cache_ttl=settings.USER_CACHE_TTL
+    )
+    shared_cache = None
+    if settings.SHARED_CACHE_PATH:
+        shared_cache = SharedRecommendationCache(
+            settings.SHARED_CACHE_PATH,
+            max_entries=settings.SHARED_CACHE_MAX_ENTRIES,
+            ttl=settings.CACHE_TTL
+        )
+    recommendation_service.cache = TieredRecommendationCache(
+        RecommendationCache(max_size=settings.CACHE_MAX_SIZE, ttl=settings.CACHE_TTL),
+        shared_cache
+    )
+    
+    # Make sure the default user has a profile
+    if await user_store.get_by_username(CURRENT_USER) is None:
+        await user_store.put(DEFAULT_USER)
+    
+    if settings.BACKGROUND_WARMUP:
+        warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up_recommendations))
+    else:
+        warm_up_recommendations()
+    
+    logger.info(f"Ready to serve {(time.perf_counter() - IMPORT_STARTED) * 1000:.0f} ms after start")
+    yield
+    
+    if warm_up_task is not None:
+        await warm_up_task
+    user_store.close()
+    recommendation_service.cache.close()
+    shutdown_cpu_executor()
+    if loop_monitor is not None:
+        loop_monitor.stop()
+
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Video Recommendation Engine",
     description=f"""
     A sophisticated recommendation system for personalized video content.
@@ -77,9 +152,25 @@ def custom_openapi():
 
 app.openapi = custom_openapi
 
+def overloaded_response(request: Request) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)},
+        content={
+            "detail": "The service is overloaded. Please retry shortly.",
+            "timestamp": CURRENT_TIME.isoformat(),
+            "path": str(request.url),
+            "type": "overloaded",
+            "user": CURRENT_USER
+        }
+    )
+
 # Add exception handler
 @app.exception_handler(Exception)
 async def universal_exception_handler(request: Request, exc: Exception):
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError)):
+        return overloaded_response(request)
+    
     error_msg = str(exc)
     stack_trace = traceback.format_exc()
     
@@ -98,6 +189,51 @@ async def universal_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# Admission control for the expensive endpoints
+endpoint_limiters = {
+    path: ConcurrencyLimiter(limit, queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000)
+    for path, limit in settings.ADMISSION_LIMITS.items()
+}
+latency_tracker = LatencyTracker(
+    settings.LATENCY_SLO_MS / 1000,
+    window=settings.LATENCY_WINDOW,
+    min_samples=settings.LATENCY_MIN_SAMPLES,
+    probe_interval=settings.LATENCY_PROBE_INTERVAL_MS / 1000
+)
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """
+    Shed requests that cannot get a slot within their queue budget, and
+    degrade recommendations while the latency SLO is breached
+    """
+    limiter = endpoint_limiters.get(request.url.path)
+    if limiter is None:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    if not await limiter.acquire():
+        logger.warning(f"Shedding request to {request.url.path}: no slot within {settings.ADMISSION_QUEUE_TIMEOUT_MS} ms")
+        return overloaded_response(request)
+    
+    # While breached, only the occasional probe is served in full
+    degraded = latency_tracker.breached and not latency_tracker.take_probe()
+    token = degraded_mode.set(degraded)
+    try:
+        return await call_next(request)
+    finally:
+        degraded_mode.reset(token)
+        limiter.release()
+        # Degraded responses are fast by design and say nothing about recovery
+        if not degraded:
+            was_breached = latency_tracker.breached
+            p95 = latency_tracker.p95()
+            if latency_tracker.record(time.perf_counter() - started) != was_breached:
+                logger.warning(
+                    f"{'Leaving' if was_breached else 'Entering'} degraded mode, "
+                    f"p95 latency {p95 * 1000:.0f} ms"
+                )
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -107,9 +243,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize recommendation service
+# Initialize recommendation service; its catalogue is loaded in lifespan
 recommendation_service = RecommendationService()
 
+# User profile store, opened in lifespan
+user_store: Optional[UserStore] = None
+
+# Background catalogue warm-up, when BACKGROUND_WARMUP is set
+warm_up_task: Optional[asyncio.Task] = None
+
+DEFAULT_USER = User(
+    id=1,
+    username=CURRENT_USER,
+    preferences={
+        "categories": [
+            "Motivation",
+            "Personal Development",
+            "Success Stories",
+            "Emotional Wellness"
+        ],
+        "duration_preference": "medium",
+        "recommended_categories": [
+            "Leadership",
+            "Goal Setting",
+            "Time Management",
+            "Mental Health"
+        ]
+    },
+    watch_history=[],
+    mood_preferences=["motivated", "focused", "energetic"],
+    created_at=CURRENT_TIME,
+    last_active=CURRENT_TIME
+)
+
+def warm_up_recommendations():
+    started = time.perf_counter()
+    recommendation_service.warm_up()
+    logger.info(f"Recommendation catalogue warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+def wants_binary(request: Request) -> bool:
+    """
+    Whether the client negotiated the binary recommendation format
+    """
+    return binary_recommendations.prefers_binary(request.headers.get("accept", ""))
+
+def binary_response(ids, scores, categories) -> Response:
+    return Response(
+        content=binary_recommendations.encode_recommendations(ids, scores, categories),
+        media_type=binary_recommendations.MEDIA_TYPE
+    )
+
+async def load_user_profile(user_id: int):
+    """
+    Hand a stored user's profile to the recommendation service
+    """
+    user = await user_store.get(user_id)
+    if user is not None:
+        recommendation_service.set_user_profile(user, user_store.get_watch_bitmap(user_id))
+
 @app.get("/", tags=["Root"])
 async def root() -> Dict[str, Any]:
     """
@@ -136,6 +327,7 @@ async def root() -> Dict[str, Any]:
 
 @app.get("/recommendations/", response_model=List[VideoRecommendation], tags=["Recommendations"])
 async def get_recommendations(
+    request: Request,
     user_id: int,
     limit: Optional[int] = 10,
     mood: Optional[str] = None
@@ -149,7 +341,8 @@ async def get_recommendations(
     - mood: Optional mood filter for recommendations
     
     Returns:
-    - List of video recommendations tailored to the user
+    - List of video recommendations tailored to the user, or only their
+      ids, scores and category codes with Accept: application/x-recs-v1
     """
     try:
         if limit < 1 or limit > 50:
@@ -164,6 +357,14 @@ async def get_recommendations(
                 detail="Invalid user ID"
             )
             
+        await load_user_profile(user_id)
+        if wants_binary(request):
+            return binary_response(*await recommendation_service.get_recommendation_scores(
+                user_id=user_id,
+                limit=limit,
+                mood=mood
+            ))
+        
         recommendations = await recommendation_service.get_recommendations(
             user_id=user_id,
             limit=limit,
@@ -172,6 +373,9 @@ async def get_recommendations(
         
         return recommendations or []
         
+    except (HTTPException, TimeoutError, asyncio.TimeoutError):
+        # Bad requests keep their status and timeouts become a 503
+        raise
     except Exception as e:
         logger.error(f"Error in get_recommendations: {str(e)}")
         raise HTTPException(
@@ -181,8 +385,10 @@ async def get_recommendations(
 
 @app.get("/recommendations/mood/", response_model=List[VideoRecommendation], tags=["Recommendations"])
 async def get_mood_based_recommendations(
+    request: Request,
     mood: str,
-    limit: Optional[int] = 10
+    limit: Optional[int] = 10,
+    user_id: Optional[int] = None
 ) -> List[VideoRecommendation]:
     """
     Get video recommendations based on mood.
@@ -190,9 +396,11 @@ async def get_mood_based_recommendations(
     Parameters:
     - mood: The mood to base recommendations on (e.g., "motivated", "sad", "focused")
     - limit: Maximum number of recommendations to return (default: 10, max: 50)
+    - user_id: Optional user whose watched videos are skipped and preferred moods boosted
     
     Returns:
-    - List of mood-based video recommendations
+    - List of mood-based video recommendations, or only their ids, scores
+      and category codes with Accept: application/x-recs-v1
     """
     try:
         if limit < 1 or limit > 50:
@@ -201,13 +409,26 @@ async def get_mood_based_recommendations(
                 detail="Limit must be between 1 and 50"
             )
             
+        if user_id is not None:
+            await load_user_profile(user_id)
+        if wants_binary(request):
+            return binary_response(*await recommendation_service.get_mood_based_scores(
+                mood=mood,
+                limit=limit,
+                user_id=user_id
+            ))
+        
         recommendations = await recommendation_service.get_mood_based_recommendations(
             mood=mood,
-            limit=limit
+            limit=limit,
+            user_id=user_id
         )
         
         return recommendations or []
         
+    except (HTTPException, TimeoutError, asyncio.TimeoutError):
+        # Bad requests keep their status and timeouts become a 503
+        raise
     except Exception as e:
         logger.error(f"Error in get_mood_based_recommendations: {str(e)}")
         raise HTTPException(
@@ -250,40 +471,31 @@ async def get_user_preferences(username: str) -> Dict[str, Any]:
     """
     Get user preferences and recommended content categories
     """
-    if username != CURRENT_USER:
+    user = await user_store.get_by_username(username)
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User not found: {username}"
         )
     
+    preferences = user.preferences or {}
+    categories = preferences.get("categories", [])
+    watch_bitmap = user_store.get_watch_bitmap(user.id) or b""
     return {
-        "username": CURRENT_USER,
-        "last_active": CURRENT_TIME.isoformat(),
+        "username": user.username,
+        "last_active": user.last_active.isoformat(),
         "preferences": {
-            "categories": [
-                "Motivation",
-                "Personal Development",
-                "Success Stories",
-                "Emotional Wellness"
-            ],
-            "duration_preference": "medium",
-            "preferred_moods": [
-                "motivated",
-                "focused",
-                "energetic"
-            ]
+            "categories": categories,
+            "duration_preference": preferences.get("duration_preference"),
+            "preferred_moods": user.mood_preferences
         },
-        "recommended_categories": [
-            "Leadership",
-            "Goal Setting",
-            "Time Management",
-            "Mental Health"
-        ],
+        "recommended_categories": preferences.get("recommended_categories", []),
         "engagement_metrics": {
-            "videos_watched": 42,
-            "average_watch_time": 325,
-            "favorite_category": "Motivation",
-            "completion_rate": 0.87
+            "videos_watched": len(WatchHistory.from_bytes(watch_bitmap, len(watch_bitmap) * 8)),
+            # Watch time and completion are not tracked per user yet
+            "average_watch_time": None,
+            "favorite_category": categories[0] if categories else None,
+            "completion_rate": None
         },
         "timestamp": CURRENT_TIME.isoformat()
     }
@@ -307,13 +519,24 @@ async def health_check() -> Dict[str, Any]:
         "version": API_VERSION,
         "environment": "production",
         "services": {
-            "recommendation_engine": "operational",
+            "recommendation_engine": (
+                "warming_up" if not recommendation_service.is_warm
+                else "degraded" if latency_tracker.breached
+                else "operational"
+            ),
             "video_platforms": "connected",
             "user_preferences": "available"
         }
     }
 
 if __name__ == "__main__":
+    if "--import-report" in sys.argv:
+        from app.core.startup import import_time_report, format_import_time_report
+        print(format_import_time_report(import_time_report("main")))
+        sys.exit(0)
+    
+    import uvicorn
+    
     logger.info(f"\nStarting Video Recommendation Engine...")
     logger.info(f"Current time (UTC): {CURRENT_TIME.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info(f"Current user: {CURRENT_USER}")
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.core.admission import ConcurrencyLimiter, LatencyTracker
+
+def test_limiter_sheds_once_queue_timeout_passes():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, queue_timeout=0.01)
+        assert await limiter.acquire()
+        assert not await limiter.acquire()
+        limiter.release()
+        assert await limiter.acquire()
+
+    asyncio.run(scenario())
+
+def test_limiter_admits_waiter_released_within_timeout():
+    async def scenario():
+        limiter = ConcurrencyLimiter(1, queue_timeout=1.0)
+        await limiter.acquire()
+        asyncio.get_running_loop().call_later(0.01, limiter.release)
+        assert await limiter.acquire()
+
+    asyncio.run(scenario())
+
+def test_single_slow_sample_does_not_breach():
+    tracker = LatencyTracker(0.25, min_samples=20)
+    assert not tracker.record(0.3)
+
+def test_breaches_and_recovers_on_full_windows():
+    tracker = LatencyTracker(0.25, min_samples=20)
+    for _ in range(19):
+        assert not tracker.record(0.3)
+    assert tracker.record(0.3)
+
+    # Recovery needs a fresh window of fast samples
+    for _ in range(19):
+        assert tracker.record(0.1)
+    assert not tracker.record(0.1)
+
+def test_probes_are_spaced_by_interval():
+    tracker = LatencyTracker(0.25, probe_interval=60)
+    assert tracker.take_probe()
+    assert not tracker.take_probe()
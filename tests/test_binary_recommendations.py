@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.models.binary_recommendations import (
+    MAGIC,
+    category_name,
+    decode_recommendations,
+    encode_recommendations,
+    prefers_binary
+)
+
+def test_round_trip():
+    ids = np.array([3, 1, 25], dtype=np.uint32)
+    scores = np.array([0.9, 0.5, 0.125], dtype=np.float32)
+    categories = np.array([0, 4, 2], dtype=np.uint8)
+
+    payload = encode_recommendations(ids, scores, categories)
+    decoded_ids, decoded_scores, decoded_categories = decode_recommendations(payload)
+    assert decoded_ids.tolist() == ids.tolist()
+    assert decoded_scores.tolist() == scores.tolist()
+    assert [category_name(code) for code in decoded_categories] == ["positive", "mental", "neutral"]
+
+def test_round_trip_through_bytes():
+    payload = encode_recommendations(np.array([7]), np.array([0.25]), np.array([1]))
+    assert isinstance(payload, bytes) and payload.startswith(MAGIC)
+    ids, scores, categories = decode_recommendations(payload)
+    assert (ids.tolist(), scores.tolist(), categories.tolist()) == ([7], [0.25], [1])
+
+def test_empty_payload():
+    ids, scores, categories = decode_recommendations(
+        encode_recommendations(np.empty(0), np.empty(0), np.empty(0))
+    )
+    assert len(ids) == len(scores) == len(categories) == 0
+
+def test_rejects_other_payloads():
+    payload = bytearray(encode_recommendations(np.array([1]), np.array([0.5]), np.array([0])))
+    payload[:4] = b"JSON"
+    with pytest.raises(ValueError):
+        decode_recommendations(bytes(payload))
+
+def test_negotiates_binary_only_when_preferred():
+    assert prefers_binary("application/x-recs-v1")
+    assert prefers_binary("application/json;q=0.5, application/x-recs-v1")
+    assert prefers_binary("Application/X-Recs-V1; q=0.9, text/html")
+    assert not prefers_binary("")
+    assert not prefers_binary("application/json")
+    assert not prefers_binary("application/x-recs-v1;q=0")
+    assert not prefers_binary("application/x-recs-v1;q=0.5, */*")
+    assert not prefers_binary("application/x-recs-v1;q=oops")
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.moods import MOOD_CATEGORY_FEATURES, MOOD_FEATURES
+from app.models.user import User
+from app.services.mood_index import MoodIndex
+from app.services.recommendation_service import RecommendationService
+from app.services.watch_history import WatchHistory
+
+NOW = datetime(2025, 3, 2, 6, 41, 20)
+
+def test_cache_key_changes_with_ranking_settings(monkeypatch):
+    key = RecommendationService()._cache_key("happy", 5, None)
+    monkeypatch.setattr(settings, "DIVERSITY_WEIGHT", settings.DIVERSITY_WEIGHT + 0.1)
+    assert RecommendationService()._cache_key("happy", 5, None) != key
+
+def test_cache_key_changes_with_catalogue():
+    service = RecommendationService()
+    key = service._cache_key("happy", 5, None)
+
+    changed = RecommendationService()
+    changed.video_platforms["youtube"]["video_moods"]["ZbZSe6N_BXs"] = [0.9, 0.8, 0.6]
+    assert changed._cache_key("happy", 5, None) != key
+    assert RecommendationService()._cache_key("happy", 5, None) == key
+
+def test_blended_moods_embed_as_the_mean_of_their_words():
+    service = RecommendationService()
+    expected = service.mood_index.embed(np.mean([MOOD_FEATURES["happy"], MOOD_FEATURES["relaxed"]], axis=0))
+    assert np.allclose(service._embed_mood("Happy and relaxed"), expected)
+
+def test_moods_without_features_embed_as_their_category_anchor():
+    service = RecommendationService()
+    embed = service.mood_index.embed
+    # Known base mood without features of its own
+    assert np.allclose(service._embed_mood("calm"), embed(MOOD_CATEGORY_FEATURES["neutral"]))
+    # Unknown words fall back to word association, then neutral
+    assert np.allclose(service._embed_mood("feeling great"), embed(MOOD_CATEGORY_FEATURES["positive"]))
+    assert np.allclose(service._embed_mood("xyzzy"), embed(MOOD_CATEGORY_FEATURES["neutral"]))
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(1)
+    index = MoodIndex([str(i) for i in range(100)], ["neutral"] * 100, rng.random((100, 3)))
+    query = index.embed(rng.random(3))
+    exclude = rng.random(100) < 0.3
+    full = np.argsort(-(index.matrix @ query), kind="stable")
+
+    for k in (1, 10, 100, 150):
+        rows, scores = index.top_k(query, k)
+        assert rows.tolist() == full[:k].tolist()
+        assert np.array_equal(scores, (index.matrix @ query)[rows])
+
+        rows, _ = index.top_k(query, k, exclude)
+        assert rows.tolist() == [row for row in full if not exclude[row]][:k]
+
+@pytest.mark.parametrize("ranking_mode", ["embedding", "category"])
+def test_user_who_watched_everything_gets_repeats(ranking_mode):
+    service = RecommendationService(ranking_mode)
+    watched = WatchHistory.from_video_ids(range(1, len(service.mood_index) + 1), len(service.mood_index))
+    service.set_user_profile(User(id=1, username="all", created_at=NOW, last_active=NOW), watched.to_bytes())
+
+    ids, _, _ = service._score_arrays("happy", 5, *service._ranking_inputs("happy", 1))
+    assert len(ids) == 5
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.services.reranking import mmr_rerank
+
+def brute_force_mmr(embeddings, relevance, k, diversity):
+    vectors = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-6)
+    picked = []
+    while len(picked) < min(k, len(relevance)):
+        best, best_score = None, -np.inf
+        for i in range(len(relevance)):
+            if i in picked:
+                continue
+            similarity = max((float(vectors[i] @ vectors[j]) for j in picked), default=0.0)
+            score = (1 - diversity) * relevance[i] - diversity * similarity
+            if score > best_score:
+                best, best_score = i, score
+        picked.append(best)
+    return picked
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 40))
+        embeddings = rng.standard_normal((n, 8)).astype(np.float32)
+        relevance = rng.random(n).astype(np.float32)
+        k = int(rng.integers(1, n + 1))
+        diversity = float(rng.uniform(0.05, 0.95))
+        assert mmr_rerank(embeddings, relevance, k, diversity).tolist() == brute_force_mmr(
+            embeddings.astype(np.float64), relevance.astype(np.float64), k, diversity
+        )
+
+def test_no_diversity_ranks_by_relevance():
+    relevance = np.array([0.2, 0.9, 0.5, 0.9])
+    picked = mmr_rerank(np.eye(4), relevance, 3, diversity=0)
+    assert picked.tolist() == [1, 3, 2]
+
+def test_near_duplicates_are_spread_out():
+    embeddings = np.array([[1.0, 0.0], [1.0, 0.01], [0.0, 1.0]])
+    relevance = np.array([1.0, 0.99, 0.6])
+    assert mmr_rerank(embeddings, relevance, 2, diversity=0.5).tolist() == [0, 2]
+
+def test_k_larger_than_pool():
+    assert len(mmr_rerank(np.eye(3), np.ones(3), 10)) == 3
+    assert len(mmr_rerank(np.empty((0, 3)), np.empty(0), 5)) == 0
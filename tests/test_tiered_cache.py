@@ -0,0 +1,48 @@
+import threading
+
+from app.cache import RecommendationCache, SharedRecommendationCache, TieredRecommendationCache
+from app.cache import shared_cache
+
+def make_worker(path):
+    shared = SharedRecommendationCache(str(path), version_check_interval=0)
+    return TieredRecommendationCache(RecommendationCache(max_size=10), shared)
+
+def test_hit_from_another_worker(tmp_path):
+    first, second = make_worker(tmp_path / "cache.db"), make_worker(tmp_path / "cache.db")
+    first.store_recommendations("happy", [{"id": 1}])
+    first.shared.flush()
+
+    assert second.get_recommendations("happy") == [{"id": 1}]
+    # Now served from the second worker's local tier too
+    assert "happy" in second.local.cache
+    first.close()
+    second.close()
+
+def test_invalidation_drops_local_entries_of_every_worker(tmp_path):
+    first, second = make_worker(tmp_path / "cache.db"), make_worker(tmp_path / "cache.db")
+    first.store_recommendations("happy", [{"id": 1}])
+    first.shared.flush()
+    assert second.get_recommendations("happy") == [{"id": 1}]
+
+    first.invalidate_all()
+    assert len(first.local.cache) == 0
+    assert first.get_recommendations("happy") is None
+    assert second.get_recommendations("happy") is None
+    first.close()
+    second.close()
+
+def test_writes_beyond_backlog_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_cache, "_MAX_PENDING_WRITES", 2)
+    cache = SharedRecommendationCache(str(tmp_path / "cache.db"))
+
+    # Hold the writer so stores pile up
+    release = threading.Event()
+    cache._writer.submit(release.wait)
+    for key in ("a", "b", "c", "d"):
+        cache.store_recommendations(key, [{"id": key}])
+    release.set()
+    cache.flush()
+
+    stored = [key for key in ("a", "b", "c", "d") if cache.get_recommendations(key) is not None]
+    assert stored == ["a", "b"]
+    cache.close()
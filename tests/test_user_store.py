@@ -0,0 +1,106 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+from app.models.user import User
+from app.services.watch_history import WatchHistory
+from app.storage import UserStore
+from app.storage import user_store
+
+def make_user(user_id, watch_history=(), **fields):
+    now = datetime(2025, 3, 2, 6, 41, 20)
+    return User(
+        id=user_id,
+        username=f"user{user_id}",
+        watch_history=list(watch_history),
+        created_at=now,
+        last_active=now,
+        **fields
+    )
+
+def test_get_by_username_reads_through(tmp_path):
+    async def scenario():
+        writer = UserStore(str(tmp_path / "users.db"))
+        await writer.put(make_user(7, [3, 5], mood_preferences=["happy"]))
+
+        reader = UserStore(str(tmp_path / "users.db"))
+        user = await reader.get_by_username("user7")
+        assert user.id == 7 and user.mood_preferences == ["happy"]
+        # Ids are never materialized; the bitmap holds the history
+        assert user.watch_history == []
+        assert 5 in WatchHistory.from_bytes(reader.get_watch_bitmap(7), 8)
+
+        # Served from the cache even once the row is gone
+        with sqlite3.connect(str(tmp_path / "users.db")) as conn:
+            conn.execute("DELETE FROM users")
+        assert await reader.get_by_username("user7") is user
+        assert await reader.get_by_username("nobody") is None
+        writer.close()
+        reader.close()
+
+    asyncio.run(scenario())
+
+def test_get_many_splits_into_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_store, "_MAX_BATCH", 2)
+
+    async def scenario():
+        writer = UserStore(str(tmp_path / "users.db"))
+        await writer.put_many(make_user(user_id) for user_id in range(1, 6))
+
+        reader = UserStore(str(tmp_path / "users.db"))
+        await reader.get(3)
+        users = await reader.get_many([1, 2, 3, 4, 5, 99, 1])
+        assert sorted(users) == [1, 2, 3, 4, 5]
+        assert all(users[user_id].username == f"user{user_id}" for user_id in users)
+        writer.close()
+        reader.close()
+
+    asyncio.run(scenario())
+
+def test_eviction_keeps_indexes_in_sync(tmp_path):
+    async def scenario():
+        store = UserStore(str(tmp_path / "users.db"), cache_size=2)
+        await store.put_many(make_user(user_id, [user_id]) for user_id in (1, 2))
+        await store.get(1)
+        await store.put(make_user(3, [3]))
+
+        # User 2 was least recently used
+        assert list(store.cache) == [1, 3]
+        assert store.username_ids == {"user1": 1, "user3": 3}
+        assert store.get_watch_bitmap(2) is None
+
+        # Renaming a user drops the old username
+        await store.put(make_user(3).model_copy(update={"username": "renamed"}))
+        assert store.username_ids == {"user1": 1, "renamed": 3}
+        store.close()
+
+    asyncio.run(scenario())
+
+def test_put_without_watch_history_keeps_stored_one(tmp_path):
+    async def scenario():
+        store = UserStore(str(tmp_path / "users.db"))
+        await store.put(make_user(4, [1, 2, 9]))
+        user = await store.get(4)
+        await store.put(user.model_copy(update={"mood_preferences": ["calm"]}))
+
+        reader = UserStore(str(tmp_path / "users.db"))
+        assert (await reader.get(4)).mood_preferences == ["calm"]
+        assert len(WatchHistory.from_bytes(reader.get_watch_bitmap(4), 16)) == 3
+        store.close()
+        reader.close()
+
+    asyncio.run(scenario())
+
+def test_expired_entries_are_reread(tmp_path):
+    async def scenario():
+        first = UserStore(str(tmp_path / "users.db"), cache_ttl=0)
+        second = UserStore(str(tmp_path / "users.db"))
+        await second.put(make_user(5, mood_preferences=["sad"]))
+        assert (await first.get(5)).mood_preferences == ["sad"]
+
+        await second.put(make_user(5, mood_preferences=["happy"]))
+        assert (await first.get(5)).mood_preferences == ["happy"]
+        first.close()
+        second.close()
+
+    asyncio.run(scenario())
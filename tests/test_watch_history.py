@@ -0,0 +1,35 @@
+import numpy as np
+
+from app.services.mood_index import MoodIndex
+from app.services.watch_history import WatchHistory
+
+def test_mask_marks_watched_rows():
+    history = WatchHistory.from_video_ids([1, 3, 10], 10)
+    assert np.flatnonzero(history.mask()).tolist() == [0, 2, 9]
+    assert 3 in history and 2 not in history
+    assert len(history) == 3
+
+def test_ids_outside_catalogue_are_ignored():
+    history = WatchHistory.from_video_ids([0, 2, 11, 50], 10)
+    assert np.flatnonzero(history.mask()).tolist() == [1]
+
+def test_bytes_round_trip():
+    history = WatchHistory.from_video_ids([2, 7, 9], 9)
+    restored = WatchHistory.from_bytes(history.to_bytes(), 9)
+    assert np.array_equal(restored.mask(), history.mask())
+
+def test_bitmap_from_a_larger_catalogue_is_truncated():
+    history = WatchHistory.from_video_ids([4, 20], 20)
+    restored = WatchHistory.from_bytes(history.to_bytes(), 10)
+    assert np.flatnonzero(restored.mask()).tolist() == [3]
+
+def test_top_k_skips_watched_videos():
+    vectors = np.random.default_rng(0).random((20, 3))
+    index = MoodIndex([str(i) for i in range(20)], ["positive"] * 20, vectors)
+    query = index.embed([0.9, 1.0, 0.7])
+    watched = index.top_k(query, 5)[0]
+
+    history = WatchHistory.from_video_ids(watched + 1, len(index))
+    rows, _ = index.top_k(query, 20, exclude=history.mask())
+    assert len(rows) == 15
+    assert not set(rows.tolist()) & set(watched.tolist())